@@ -17,7 +17,8 @@ import re
 import inspect
 import logging
 
-from functools import wraps, partial
+from collections import defaultdict
+from functools import wraps
 
 import tank
 import traceback
@@ -40,6 +41,15 @@ if not hasattr(ix, "shotgun"):
     ix.shotgun = lambda: None
     ix.shotgun.menu_callbacks = {}
 
+# folder where the core platform qt resources reside, it does not change
+# during the session so we only resolve it once
+_PLATFORM_QT_DIR = os.path.join(
+    os.path.abspath(inspect.getfile(tank.platform)), "qt"
+)
+
+# root menu items already looked up, keyed by menu name
+_ROOT_MENU_CACHE = {}
+
 
 def show_error(msg):
     print("Shotgun Error | Clarisse engine | %s " % msg)
@@ -69,56 +79,118 @@ def show_info(msg):
     )
 
 
-def display_error(msg):
+# whether debug messages are displayed, kept here rather than read on every
+# display_debug call. The engine refreshes it with set_debug when it starts
+# and whenever toolkit debug logging is toggled.
+_TK_DEBUG = os.environ.get("TK_DEBUG") == "1"
+
+
+def set_debug(enabled=None):
+    """
+    Enables or disables the display of debug messages.
+
+    :param enabled: True or False, or None to read it again from the
+        TK_DEBUG environment variable and the toolkit global debug logging.
+    """
+    global _TK_DEBUG
+    if enabled is None:
+        enabled = (
+            os.environ.get("TK_DEBUG") == "1" or LogManager().global_debug
+        )
+    _TK_DEBUG = bool(enabled)
+
+
+def display_error(msg, *args):
+    if args:
+        msg = msg % args
     t = time.asctime(time.localtime())
-    print("%s - Shotgun Error | Clarisse engine | %s " % (t, msg))
-    ix.application.log_error(
-        "%s - Shotgun Error | Clarisse engine | %s " % (t, msg)
-    )
+    msg = "%s - Shotgun Error | Clarisse engine | %s " % (t, msg)
+    print(msg)
+    ix.application.log_error(msg)
 
 
-def display_warning(msg):
+def display_warning(msg, *args):
+    if args:
+        msg = msg % args
     t = time.asctime(time.localtime())
     ix.application.log_warning(
         "%s - Shotgun Warning | Clarisse engine | %s " % (t, msg)
     )
 
 
-def display_info(msg):
+def display_info(msg, *args):
+    if args:
+        msg = msg % args
     t = time.asctime(time.localtime())
     ix.application.log_info(
         "%s - Shotgun Info | Clarisse engine | %s " % (t, msg)
     )
 
 
-def display_debug(msg):
-    if os.environ.get("TK_DEBUG") == "1":
-        t = time.asctime(time.localtime())
-        ix.application.log_info(
-            "%s - Shotgun Debug | Clarisse engine | %s " % (t, msg)
-        )
+def display_debug(msg, *args):
+    if not _TK_DEBUG:
+        return
+
+    if args:
+        msg = msg % args
+    t = time.asctime(time.localtime())
+    ix.application.log_info(
+        "%s - Shotgun Debug | Clarisse engine | %s " % (t, msg)
+    )
+
+
+# Clarisse display functions indexed by logging level // 10, clamped to the
+# table, ie. NOTSET and below, DEBUG, INFO, WARNING, ERROR and CRITICAL or
+# above
+DISPLAY_FUNCTIONS = (
+    display_debug,
+    display_debug,
+    display_info,
+    display_warning,
+    display_error,
+    display_error,
+)
+
+# formatters used to display the toolkit log records in Clarisse
+DEBUG_LOG_FORMATTER = logging.Formatter(
+    "Debug: Shotgun %(basename)s: %(message)s"
+)
+LOG_FORMATTER = logging.Formatter("Shotgun %(basename)s: %(message)s")
 
 
 # we use a trick with decorators to get some sort of event notification
 # when the scene is saved/loaded, etc... we could use a timer similar to
 # what tk-houdini uses but this other aproach is more generic
 def wrapped(function, watcher, post_callback=None, pre_callback=None):
-    @wraps(function)
-    def wrapper(*args, **kwargs):
-        try:
-            if pre_callback is not None:
-                pre_callback(watcher)
+    # pick the wrapper once, at decoration time, so the scene operations
+    # do not pay for checking which callbacks are set on every call
+    if pre_callback is not None and post_callback is not None:
 
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            pre_callback(watcher)
             result = function(*args, **kwargs)
+            post_callback(watcher)
+            return result
 
-            if post_callback is not None:
-                post_callback(watcher)
+    elif pre_callback is not None:
 
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            pre_callback(watcher)
+            return function(*args, **kwargs)
+
+    elif post_callback is not None:
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            result = function(*args, **kwargs)
+            post_callback(watcher)
             return result
-        except:
-            raise
 
-    wrapper._original = function
+    else:
+        return function
+
     return wrapper
 
 
@@ -157,7 +229,8 @@ class SceneEventWatcher(object):
         """
         self.__cb_fn = cb_fn
         self.__run_once = run_once
-        self.__wrapped_fns = {}
+        # list of (event name, original function, wrapped function)
+        self.__wrapped_fns = []
 
         # register scene event callbacks:
         self.start_watching()
@@ -172,15 +245,15 @@ class SceneEventWatcher(object):
         # now add callbacks to watch for some scene events:
         for event_name in SCENE_EVENT_NAMES:
             try:
-                event_fn = getattr(ix.application, event_name)
+                original_fn = getattr(ix.application, event_name)
                 event_fn = wrapped(
-                    event_fn,
+                    original_fn,
                     self,
                     post_callback=SceneEventWatcher.__scene_event_callback,
                 )
-                self.__wrapped_fns[event_name] = event_fn
+                self.__wrapped_fns.append((event_name, original_fn, event_fn))
                 setattr(ix.application, event_name, event_fn)
-                display_debug("Registered callback on %s " % event_name)
+                display_debug("Registered callback on %s ", event_name)
             except Exception:
                 traceback.print_exc()
                 # report warning...
@@ -188,22 +261,24 @@ class SceneEventWatcher(object):
 
         # create a callback that will be run when Clarisse
         # exits so we can do some clean-up:
-        event_fn = getattr(ix.application, SCENE_QUIT_EVENT_NAME)
+        original_fn = getattr(ix.application, SCENE_QUIT_EVENT_NAME)
         event_fn = wrapped(
-            event_fn,
+            original_fn,
             self,
             pre_callback=SceneEventWatcher.__clarisse_exiting_callback,
         )
-        self.__wrapped_fns[SCENE_QUIT_EVENT_NAME] = event_fn
+        self.__wrapped_fns.append(
+            (SCENE_QUIT_EVENT_NAME, original_fn, event_fn)
+        )
         setattr(ix.application, SCENE_QUIT_EVENT_NAME, event_fn)
 
     def stop_watching(self):
         """
         Stops watching the Clarisse scene.
         """
-        for event_name, event_fn in self.__wrapped_fns.iteritems():
-            setattr(ix.application, event_name, event_fn._original)
-        self.__wrapped_fns = {}
+        for event_name, original_fn, _ in self.__wrapped_fns:
+            setattr(ix.application, event_name, original_fn)
+        self.__wrapped_fns = []
 
     @staticmethod
     def __scene_event_callback(watcher):
@@ -226,6 +301,17 @@ class SceneEventWatcher(object):
 # methods to support the state when the engine cannot start up
 # for example if a non-tank file is loaded in clarisse
 
+ENGINE_START_ERROR_MESSAGE = """Shotgun Clarisse Engine cannot be started:.
+Please contact you technical support team for more information.
+
+"""
+
+CONTEXT_CHANGE_ERROR_MESSAGE = """Message: Shotgun encountered a problem \
+changing the Engine's context.
+Please contact you technical support team for more information.
+
+"""
+
 
 def refresh_engine(engine_name, prev_context, menu_name):
     """
@@ -265,14 +351,9 @@ def refresh_engine(engine_name, prev_context, menu_name):
                 current_engine.context.project
             )
         except tank.TankError:
-            (exc_type, exc_value, exc_traceback) = sys.exc_info()
-            message = ""
-            message += "Shotgun Clarisse Engine cannot be started:.\n"
-            message += "Please contact you technical support team for more "
-            message += "information.\n\n"
-            message += "Exception: %s - %s\n" % (exc_type, exc_value)
-            message += "Traceback (most recent call last):\n"
-            message += "\n".join(traceback.format_tb(exc_traceback))
+            message = ENGINE_START_ERROR_MESSAGE + "".join(
+                traceback.format_exception(*sys.exc_info())
+            )
 
             # build disabled menu
             create_sgtk_disabled_menu(menu_name)
@@ -298,20 +379,38 @@ def on_scene_event_callback(engine_name, prev_context, menu_name):
     try:
         refresh_engine(engine_name, prev_context, menu_name)
     except Exception:
-        (exc_type, exc_value, exc_traceback) = sys.exc_info()
-        message = ""
-        message += (
-            "Message: Shotgun encountered a problem changing the "
-            "Engine's context.\n"
+        message = CONTEXT_CHANGE_ERROR_MESSAGE + "".join(
+            traceback.format_exception(*sys.exc_info())
         )
-        message += "Please contact you technical support team for more "
-        message += "information.\n\n"
-        message += "Exception: %s - %s\n" % (exc_type, exc_value)
-        message += "Traceback (most recent call last):\n"
-        message += "\n".join(traceback.format_tb(exc_traceback))
         show_error(message)
 
 
+class SceneEventCallback(object):
+    """
+    Callable run by the scene event watcher.
+
+    The previous context is kept as an attribute so that it can be updated
+    in place on every context change instead of rebuilding the watcher.
+    """
+
+    def __init__(self, engine_name, prev_context, menu_name):
+        """
+        Constructor.
+
+        :param engine_name: Name of the engine instance.
+        :param prev_context: Context the engine is currently in.
+        :param menu_name: Name of the Shotgun menu.
+        """
+        self.engine_name = engine_name
+        self.prev_context = prev_context
+        self.menu_name = menu_name
+
+    def __call__(self):
+        on_scene_event_callback(
+            self.engine_name, self.prev_context, self.menu_name
+        )
+
+
 def sgtk_disabled_message():
     """
     Explain why tank is disabled.
@@ -333,14 +432,20 @@ def clear_sgtk_menu(menu_name):
     sg_menu = get_sgtk_root_menu(menu_name)
     sg_menu.remove_all_commands()
     ix.shotgun.menu_callbacks = {}
+    _ROOT_MENU_CACHE.pop(menu_name, None)
 
 
 def get_sgtk_root_menu(menu_name):
+    sg_menu = _ROOT_MENU_CACHE.get(menu_name)
+    if sg_menu:
+        return sg_menu
+
     menu = ix.application.get_main_menu()
 
     sg_menu = menu.get_item(menu_name + ">")
     if not sg_menu:
         sg_menu = menu.add_command(menu_name + ">")
+    _ROOT_MENU_CACHE[menu_name] = sg_menu
     return sg_menu
 
 
@@ -380,6 +485,7 @@ class ClarisseEngine(Engine):
     _DIALOG_PARENT = None
     _WIN32_CLARISSE_MAIN_HWND = None
     _PROXY_WIN_HWND = None
+    _has_ui = None
 
     def __get_platform_resource_path(self, filename):
         """
@@ -387,8 +493,7 @@ class ClarisseEngine(Engine):
         Resources reside in the core/platform/qt folder.
         :return: full path
         """
-        tank_platform_folder = os.path.abspath(inspect.getfile(tank.platform))
-        return os.path.join(tank_platform_folder, "qt", filename)
+        return os.path.join(_PLATFORM_QT_DIR, filename)
 
     def __toggle_debug_logging(self):
         """
@@ -397,6 +502,7 @@ class ClarisseEngine(Engine):
         """
         # flip debug logging
         LogManager().global_debug = not LogManager().global_debug
+        set_debug(LogManager().global_debug)
 
     def __open_log_folder(self):
         """
@@ -506,11 +612,30 @@ class ClarisseEngine(Engine):
         QtCore.QTextCodec.setCodecForCStrings(utf8)
         self.logger.debug("set utf-8 codec for widget text")
         self.win_32_utils = self.import_module("win_32_utils")
+        self.tk_clarisse = self.import_module("tk_clarisse")
+
+        if sys.platform == "win32":
+            # keep direct references to the win32 functions and constants
+            # used to parent the Toolkit dialogs to Clarisse
+            win_32_api = self.win_32_utils.win_32_api
+            self._w32_get_style = win_32_api.GetWindowLong
+            self._w32_set_style = win_32_api.SetWindowLong
+            self._w32_set_parent = win_32_api.SetParent
+            self._w32_gwl_exstyle = win_32_api.GWL_EXSTYLE
+            self._w32_ws_ex_noparentnotify = win_32_api.WS_EX_NOPARENTNOTIFY
+            self._w32_find_windows = win_32_api.find_windows
+            self._w32_winid_to_hwnd = win_32_api.qwidget_winid_to_hwnd
+
+        # the debug_logging setting may have changed the toolkit debug
+        # logging since this module was imported
+        set_debug()
 
     def init_engine(self):
         """
         Initializes the Clarisse engine.
         """
+        set_debug()
+
         self.logger.debug("%s: Initializing...", self)
 
         # check that we are running an ok version of clarisse
@@ -596,14 +721,15 @@ class ClarisseEngine(Engine):
             # need to watch some scene events in case the engine needs
             # rebuilding:
 
-            cb_fn = partial(
-                on_scene_event_callback,
+            self.__scene_event_cb = SceneEventCallback(
                 engine_name=self.instance_name,
                 prev_context=self.context,
                 menu_name=self._menu_name,
             )
 
-            self.__watcher = SceneEventWatcher(cb_fn, run_once=False)
+            self.__watcher = SceneEventWatcher(
+                self.__scene_event_cb, run_once=False
+            )
             self.logger.debug("Registered open and save callbacks.")
 
     def create_shotgun_menu(self):
@@ -620,8 +746,7 @@ class ClarisseEngine(Engine):
             self._menu_handle = get_sgtk_root_menu(self._menu_name)
 
             # create our menu handler
-            tk_clarisse = self.import_module("tk_clarisse")
-            self._menu_generator = tk_clarisse.MenuGenerator(
+            self._menu_generator = self.tk_clarisse.MenuGenerator(
                 self, self._menu_handle
             )
             self._menu_generator.create_menu()
@@ -655,9 +780,10 @@ class ClarisseEngine(Engine):
             self._initialize_dark_look_and_feel()
 
         self.logger.debug("APPING UP")
-        import pyqt_clarisse
-        pyqt_clarisse.exec_(qt_app)
-        self.logger.debug("PARENT: {}".format(self._DIALOG_PARENT))
+        # pump the Qt events from the Clarisse event loop using our own
+        # integration rather than the one shipped with Clarisse.
+        self.tk_clarisse.pyside_clarisse.exec_(qt_app)
+        self.logger.debug("PARENT: %s", self._DIALOG_PARENT)
 
     def post_app_init(self):
         """
@@ -683,28 +809,22 @@ class ClarisseEngine(Engine):
         :param new_context: The new context being changed to.
         """
 
+        # the new environment may use a different debug_logging setting
+        set_debug()
+
         # restore the open log folder, it get's removed whenever the first time
         # a context is changed
         self.__register_open_log_folder_command()
         self.__register_reload_command()
 
         if self.get_setting("automatic_context_switch", True):
-            # We need to stop watching, and then replace with a new watcher
-            # that has a callback registered with the new context baked in.
-            # This will ensure that the context_from_path call that occurs
-            # after a File->Open receives an up-to-date "previous" context.
-            self.__watcher.stop_watching()
-
-            cb_fn = partial(
-                on_scene_event_callback,
-                engine_name=self.instance_name,
-                prev_context=self.context,
-                menu_name=self._menu_name,
-            )
-
-            self.__watcher = SceneEventWatcher(cb_fn, run_once=False)
+            # The watcher stays in place, we only need to update the context
+            # known by its callback. This will ensure that the
+            # context_from_path call that occurs after a File->Open receives
+            # an up-to-date "previous" context.
+            self.__scene_event_cb.prev_context = self.context
             self.logger.debug(
-                "Registered new open and save callbacks before"
+                "Updated open and save callbacks context before"
                 " changing context."
             )
 
@@ -718,18 +838,22 @@ class ClarisseEngine(Engine):
         setting of the environment configuration yaml file.
         """
 
-        # Build a dictionary mapping app instance names to dictionaries of
-        # commands they registered with the engine.
-        app_instance_commands = {}
-        for (command_name, value) in self.commands.iteritems():
+        # Build, in a single pass over the engine commands, a dictionary
+        # mapping (app instance name, command name) to the command function
+        # and a dictionary mapping app instance names to the list of
+        # (command name, command function) they registered with the engine.
+        command_functions = {}
+        app_instance_commands = defaultdict(list)
+        for (command_name, value) in self.commands.items():
             app_instance = value["properties"].get("app")
             if app_instance:
-                # Add entry 'command name: command function' to the command
-                # dictionary of this app instance.
-                command_dict = app_instance_commands.setdefault(
-                    app_instance.instance_name, {}
+                instance_name = app_instance.instance_name
+                command_functions[(instance_name, command_name)] = value[
+                    "callback"
+                ]
+                app_instance_commands[instance_name].append(
+                    (command_name, value["callback"])
                 )
-                command_dict[command_name] = value["callback"]
 
         # Run the series of app instance commands listed in the
         # 'run_at_startup' setting.
@@ -740,10 +864,7 @@ class ClarisseEngine(Engine):
             # given app instance.
             setting_command_name = app_setting_dict["name"]
 
-            # Retrieve the command dictionary of the given app instance.
-            command_dict = app_instance_commands.get(app_instance_name)
-
-            if command_dict is None:
+            if app_instance_name not in app_instance_commands:
                 self.logger.warning(
                     (
                         "%s configuration setting 'run_at_startup'"
@@ -752,53 +873,56 @@ class ClarisseEngine(Engine):
                     self.name,
                     app_instance_name,
                 )
-            else:
-                if not setting_command_name:
-                    # Run all commands of the given app instance.
-                    # Run these commands once Clarisse will have completed its
-                    # UI update and be idle in order to run them after the ones
-                    # that restore the persisted Shotgun app panels.
-                    for (
+            elif not setting_command_name:
+                # Run all commands of the given app instance.
+                # Run these commands once Clarisse will have completed its
+                # UI update and be idle in order to run them after the ones
+                # that restore the persisted Shotgun app panels.
+                for (command_name, command_function) in app_instance_commands[
+                    app_instance_name
+                ]:
+                    self.logger.debug(
+                        "%s startup running app '%s' command '%s'.",
+                        self.name,
+                        app_instance_name,
                         command_name,
-                        command_function,
-                    ) in command_dict.iteritems():
-                        self.logger.debug(
-                            "%s startup running app '%s' command '%s'.",
-                            self.name,
-                            app_instance_name,
-                            command_name,
-                        )
-                        clarisse.utils.executeDeferred(command_function)
+                    )
+                    clarisse.utils.executeDeferred(command_function)
+            else:
+                # Run the command whose name is listed in the
+                # 'run_at_startup' setting.
+                # Run this command once Clarisse will have completed its
+                # UI update and be idle in order to run it after the ones
+                # that restore the persisted Shotgun app panels.
+                command_function = command_functions.get(
+                    (app_instance_name, setting_command_name)
+                )
+                if command_function:
+                    self.logger.debug(
+                        "%s startup running app '%s' command '%s'.",
+                        self.name,
+                        app_instance_name,
+                        setting_command_name,
+                    )
+                    clarisse.utils.executeDeferred(command_function)
                 else:
-                    # Run the command whose name is listed in the
-                    # 'run_at_startup' setting.
-                    # Run this command once Clarisse will have completed its
-                    # UI update and be idle in order to run it after the ones
-                    # that restore the persisted Shotgun app panels.
-                    command_function = command_dict.get(setting_command_name)
-                    if command_function:
-                        self.logger.debug(
-                            "%s startup running app '%s' command '%s'.",
-                            self.name,
-                            app_instance_name,
-                            setting_command_name,
-                        )
-                        clarisse.utils.executeDeferred(command_function)
-                    else:
-                        known_commands = ", ".join(
-                            "'%s'" % name for name in command_dict
-                        )
-                        self.logger.warning(
-                            (
-                                "%s configuration setting 'run_at_startup' "
-                                "requests app '%s' unknown command '%s'. "
-                                "Known commands: %s"
-                            ),
-                            self.name,
-                            app_instance_name,
-                            setting_command_name,
-                            known_commands,
-                        )
+                    known_commands = ", ".join(
+                        "'%s'" % name
+                        for (name, _) in app_instance_commands[
+                            app_instance_name
+                        ]
+                    )
+                    self.logger.warning(
+                        (
+                            "%s configuration setting 'run_at_startup' "
+                            "requests app '%s' unknown command '%s'. "
+                            "Known commands: %s"
+                        ),
+                        self.name,
+                        app_instance_name,
+                        setting_command_name,
+                        known_commands,
+                    )
 
     def destroy_engine(self):
         """
@@ -806,6 +930,9 @@ class ClarisseEngine(Engine):
         """
         self.logger.debug("%s: Destroying...", self)
 
+        # stop pumping the Qt events, the next engine will start its own pump
+        self.tk_clarisse.pyside_clarisse.stop()
+
         if self.get_setting("automatic_context_switch", True):
             # stop watching scene events
             self.__watcher.stop_watching()
@@ -883,21 +1010,16 @@ class ClarisseEngine(Engine):
         Windows specific method to find the main Clarisse window
         handle (HWND)
         """
-        self.logger.debug("MAIN")
         if not self._WIN32_CLARISSE_MAIN_HWND:
-            found_hwnds = self.win_32_utils.win_32_api.find_windows(
+            # only look at the windows owned by this process, Clarisse
+            # creates a lot of FLTK windows and other running applications
+            # might too.
+            found_hwnds = self._w32_find_windows(
                 class_name="FLTK",
+                process_id=os.getpid(),
             )
-            import ctypes
-            RealGetWindowClass = ctypes.windll.user32.RealGetWindowClassW
-            for found in found_hwnds:
-                    buffer_len = 1024
-                    unicode_buffer = ctypes.create_unicode_buffer(buffer_len)
-                    RealGetWindowClass(found, unicode_buffer, buffer_len)
-                    window_class = unicode_buffer.value
-                    self.logger.debug("Text: {}".format(self.win_32_utils.win_32_api.safe_get_window_text(found)))
-                    self.logger.debug("Class: {}".format(window_class))
-            if found_hwnds:
+            # the main window is the second FLTK window of the process
+            if len(found_hwnds) > 1:
                 self._WIN32_CLARISSE_MAIN_HWND = found_hwnds[1]
         return self._WIN32_CLARISSE_MAIN_HWND
 
@@ -929,7 +1051,7 @@ class ClarisseEngine(Engine):
             # needed to turn a Qt5 WId into an HWND is not exposed in PySide2,
             # so we can't do what we did below for Qt4.
             if QtCore.__version__.startswith("4."):
-                proxy_win_hwnd = self.win_32_utils.win_32_api.qwidget_winid_to_hwnd(
+                proxy_win_hwnd = self._w32_winid_to_hwnd(
                     win32_proxy_win.winId(),
                 )
             else:
@@ -944,7 +1066,7 @@ class ClarisseEngine(Engine):
                 win32_proxy_win.show()
 
                 try:
-                    proxy_win_hwnd_found = self.win_32_utils.win_32_api.find_windows(
+                    proxy_win_hwnd_found = self._w32_find_windows(
                         stop_if_found=True,
                         class_name="Qt5QWindowIcon",
                         process_id=os.getpid(),
@@ -971,29 +1093,86 @@ class ClarisseEngine(Engine):
                 "properly otherwise."
             )
         else:
-            # Set the window style/flags. We don't need or want our Python
-            # dialogs to notify the Photoshop application window when they're
-            # opened or closed, so we'll disable that behavior.
-            win_ex_style = self.win_32_utils.win_32_api.GetWindowLong(
+            self._win32_parent_proxy_window(proxy_win_hwnd, sp_hwnd)
+
+        return win32_proxy_win
+
+    def _win32_parent_proxy_window(self, proxy_win_hwnd, parent_hwnd):
+        """
+        Windows-specific method to parent the proxy window to the main
+        Clarisse window.
+
+        :param proxy_win_hwnd: HWND of the proxy window.
+        :param parent_hwnd: HWND of the main Clarisse window.
+        """
+        # Set the window style/flags. We don't need or want our Python
+        # dialogs to notify the Clarisse application window when they're
+        # opened or closed, so we'll disable that behavior.
+        win_ex_style = self._w32_get_style(
+            proxy_win_hwnd, self._w32_gwl_exstyle
+        )
+
+        if not win_ex_style & self._w32_ws_ex_noparentnotify:
+            self._w32_set_style(
                 proxy_win_hwnd,
-                self.win_32_utils.win_32_api.GWL_EXSTYLE,
+                self._w32_gwl_exstyle,
+                win_ex_style | self._w32_ws_ex_noparentnotify,
             )
+        self._w32_set_parent(proxy_win_hwnd, parent_hwnd)
+        self._PROXY_WIN_HWND = proxy_win_hwnd
 
-            self.win_32_utils.win_32_api.SetWindowLong(
-                proxy_win_hwnd,
-                self.win_32_utils.win_32_api.GWL_EXSTYLE, 
-                win_ex_style | self.win_32_utils.win_32_api.WS_EX_NOPARENTNOTIFY,
+    def show_dialog(self, title, bundle, widget_class, *args, **kwargs):
+        """
+        Shows a non-modal dialog window in a way suitable for this engine.
+
+        Pass _show_deferred=True to show the dialog on the next turn of the
+        Qt event loop instead, so the caller does not have to wait for the
+        window to be created. The window is then not visible yet when this
+        method returns, and the queued show still happens if the dialog gets
+        closed before that.
+
+        :param title: The title of the window.
+        :param bundle: The app, engine or framework object that is
+            associated with this window.
+        :param widget_class: The class of the UI to be constructed. This
+            must derive from QWidget.
+
+        Additional parameters specified will be passed through to the
+        widget_class constructor, except for the reserved _show_deferred
+        keyword.
+
+        :returns: the created widget_class instance
+        """
+        show_deferred = kwargs.pop("_show_deferred", False)
+
+        if not self.has_ui:
+            self.logger.error(
+                "Sorry, this environment does not support UI display! Cannot "
+                "show the requested window '%s'.",
+                title,
             )
-            self.win_32_utils.win_32_api.SetParent(proxy_win_hwnd, sp_hwnd)
-            self._PROXY_WIN_HWND = proxy_win_hwnd
+            return None
 
-        return win32_proxy_win
+        from sgtk.platform.qt import QtCore
+
+        dialog, widget = self._create_dialog_with_widget(
+            title, bundle, widget_class, *args, **kwargs
+        )
+
+        if show_deferred:
+            QtCore.QMetaObject.invokeMethod(
+                dialog, "show", QtCore.Qt.QueuedConnection
+            )
+        else:
+            dialog.show()
+
+        return widget
 
     def _get_dialog_parent(self):
         """
         Clarisse is not Qt Based so we do not have anything to return here.
         """
-        self.logger.debug("GET PARENT: {}".format(self._DIALOG_PARENT))
+        self.logger.debug("GET PARENT: %s", self._DIALOG_PARENT)
         if not self._DIALOG_PARENT:
             self._initialise_qapplication()
             
@@ -1004,11 +1183,11 @@ class ClarisseEngine(Engine):
         """
         Detect and return if clarisse is running in batch mode
         """
-        if not ix.is_gui_application():
-            # batch mode or prompt mode
-            return False
-        else:
-            return True
+        # Clarisse cannot switch between batch and gui mode while running
+        if self._has_ui is None:
+            # False in batch mode or prompt mode
+            self._has_ui = bool(ix.is_gui_application())
+        return self._has_ui
 
     ###########################################################################
     # logging
@@ -1025,29 +1204,27 @@ class ClarisseEngine(Engine):
         :param record: Standard python logging record.
         :type record: :class:`~python.logging.LogRecord`
         """
+        # display_debug only displays anything when debug display is on, so
+        # drop the debug records before doing any formatting or thread
+        # marshaling. The flag is kept up to date by set_debug whenever the
+        # toolkit debug logging can change.
+        if record.levelno < logging.INFO and not _TK_DEBUG:
+            return
+
         # Give a standard format to the message:
         #     Shotgun <basename>: <message>
         # where "basename" is the leaf part of the logging record name,
         # for example "tk-multi-shotgunpanel" or "qt_importer".
         if record.levelno < logging.INFO:
-            formatter = logging.Formatter(
-                "Debug: Shotgun %(basename)s: %(message)s"
-            )
+            formatter = DEBUG_LOG_FORMATTER
         else:
-            formatter = logging.Formatter("Shotgun %(basename)s: %(message)s")
+            formatter = LOG_FORMATTER
 
         msg = formatter.format(record)
 
         # Select Clarisse display function to use according to the logging
         # record level.
-        if record.levelno >= logging.ERROR:
-            fct = display_error
-        elif record.levelno >= logging.WARNING:
-            fct = display_warning
-        elif record.levelno >= logging.INFO:
-            fct = display_info
-        else:
-            fct = display_debug
+        fct = DISPLAY_FUNCTIONS[max(0, min(record.levelno // 10, 5))]
 
         # Display the message in Clarisse script editor in a thread safe manner
         self.async_execute_in_main_thread(fct, msg)
@@ -1063,9 +1240,12 @@ class ClarisseEngine(Engine):
         # Make a copy of the list of Tank dialogs that have been created by the
         # engine and are still opened since the original list will be updated
         # when each dialog is closed.
-        opened_dialog_list = self.created_qt_dialogs[:]
+        opened_dialog_list = tuple(self.created_qt_dialogs)
 
         # Loop through the list of opened Tank dialogs.
+        # Each dialog is closed rather than just hidden and deleted, so that
+        # the apps get their closeEvent to clean up and the base engine drops
+        # the dialog from its own list through its close callback.
         for dialog in opened_dialog_list:
             dialog_window_title = dialog.windowTitle()
             try:
@@ -0,0 +1,145 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Qt event loop integration for Clarisse
+
+Clarisse is not Qt based, so the Qt events are pumped from Clarisse's own
+event loop. Clarisse does not let us register a file descriptor with its
+main loop, so there is no way to be woken up by Qt directly; instead Qt is
+given a bounded amount of time on each Clarisse tick while one of its
+windows is visible.
+"""
+
+from tank.platform.qt import QtGui, QtCore
+
+import ix
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+_top_level_widgets = QtGui.QApplication.topLevelWidgets
+
+# maximum time, in milliseconds, given to Qt on each Clarisse tick
+PROCESS_EVENTS_MAX_TIME = 3
+
+
+class PySideAppClarisseHelper(object):
+    """
+    Pumps the Qt events of the given QApplication from the Clarisse event
+    loop.
+    """
+
+    # True while Qt events are being processed, so that a nested Clarisse
+    # event loop run from a Qt slot does not process them again.
+    _in_process = False
+
+    def __init__(self, app):
+        self.app = app
+        self._scheduled = False
+        self._stopped = False
+
+    def schedule(self):
+        """
+        Schedules process_events in the Clarisse event loop, unless it is
+        already scheduled or the helper has been stopped.
+        """
+        if not self._scheduled and not self._stopped:
+            self._scheduled = True
+            ix.application.add_to_event_loop_single(self.process_events)
+
+    def process_events(self):
+        """
+        Processes the pending Qt events and reschedules itself in the
+        Clarisse event loop.
+        """
+        self._scheduled = False
+        if self._stopped:
+            return
+
+        if not PySideAppClarisseHelper._in_process:
+            PySideAppClarisseHelper._in_process = True
+            try:
+                self._process_pending_events()
+            finally:
+                PySideAppClarisseHelper._in_process = False
+
+        self.schedule()
+
+    def stop(self):
+        """
+        Stops pumping the Qt events, the already scheduled call returns
+        without rescheduling itself.
+        """
+        self._stopped = True
+
+    def _process_pending_events(self):
+        """
+        Gives time to Qt while one of its windows is visible, otherwise only
+        delivers the posted events.
+        """
+        if self.are_windows_visible():
+            # processEvents also delivers the posted events. Qt gets at most
+            # PROCESS_EVENTS_MAX_TIME ms per Clarisse tick so a burst of Qt
+            # events cannot starve Clarisse, whatever is left is processed
+            # on the next tick. This uses the thread's default event
+            # dispatcher, there is no need for a QEventLoop of our own.
+            QtCore.QCoreApplication.processEvents(
+                QtCore.QEventLoop.AllEvents, PROCESS_EVENTS_MAX_TIME
+            )
+        else:
+            # posted events, ie. the ones coming from the
+            # async_execute_in_main_thread calls, need to be delivered even
+            # when no window is shown. This is a no-op when the queue is
+            # empty.
+            self.app.sendPostedEvents(None, 0)
+
+    def are_windows_visible(self):
+        """
+        Returns True if any of the Qt top level widgets is visible.
+        """
+        for widget in _top_level_widgets():
+            if widget.isVisible():
+                return True
+        return False
+
+
+# keep a reference so the helper does not get garbage collected
+_clarisse_helper = None
+
+
+def exec_(app):
+    """
+    Starts pumping the Qt events of the given QApplication from Clarisse.
+
+    :param app: The QApplication to drive.
+    """
+    global _clarisse_helper
+    # the engine may call this more than once, make sure there is only ever
+    # one pump running for the application.
+    if _clarisse_helper is None or _clarisse_helper.app is not app:
+        stop()
+        _clarisse_helper = PySideAppClarisseHelper(app)
+    _clarisse_helper.schedule()
+
+
+def stop():
+    """
+    Stops pumping the Qt events from Clarisse.
+
+    The engine must call this when it is destroyed: a restarted engine loads
+    a new copy of this module, which knows nothing about the helper started
+    by the previous one.
+    """
+    global _clarisse_helper
+    if _clarisse_helper is not None:
+        _clarisse_helper.stop()
+        _clarisse_helper = None